@@ -0,0 +1,89 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from snapshot import PLOTS_PER_FIELD, load_snapshot, save_snapshot
+
+# --- 載入時間比較：data.json vs data.snap ---
+# 用法：python bench_snapshot.py [頁數] [重複次數]
+
+EVENT_NAMES = ["讀書", "寫報告", "Meeting", "Commute", "散步", "Gym", "未命名活動", "Event"]
+
+
+def make_data(field_count, seed=0):
+    rng = random.Random(seed)
+    trees = []
+    for _ in range(field_count):
+        types = [rng.randint(1, 3) for _ in range(PLOTS_PER_FIELD)]
+        trees.append({
+            "type": types,
+            "time": [rng.randint(60, 7200) for _ in range(PLOTS_PER_FIELD)],
+            "eventName": [rng.choice(EVENT_NAMES) for _ in range(PLOTS_PER_FIELD)]
+        })
+    return {"name": "Bench", "trees": trees}
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def load_json(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data['trees'][-1]
+
+
+def open_snapshot(filename):
+    # 模擬開啟 App：讀標頭並顯示最後一頁
+    data = load_snapshot(filename)
+    page = data['trees'][-1]
+    data['trees'].snapshot.close()
+    return page
+
+
+def read_full_snapshot(filename):
+    data = load_snapshot(filename)
+    return list(data['trees'])
+
+
+def main():
+    field_count = max(1, int(sys.argv[1])) if len(sys.argv) >= 2 else 20000
+    repeat = int(sys.argv[2]) if len(sys.argv) >= 3 else 5
+
+    data = make_data(field_count)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        json_file = os.path.join(temp_dir, 'data.json')
+        snapshot_file = os.path.join(temp_dir, 'data.snap')
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        save_snapshot(data, snapshot_file)
+
+        # 確認轉換無損
+        if read_full_snapshot(snapshot_file) != data['trees']:
+            print("Snapshot round trip mismatch!")
+            sys.exit(1)
+
+        json_size = os.path.getsize(json_file)
+        snapshot_size = os.path.getsize(snapshot_file)
+        json_time = best_of(repeat, lambda: load_json(json_file))
+        open_time = best_of(repeat, lambda: open_snapshot(snapshot_file))
+        full_time = best_of(repeat, lambda: read_full_snapshot(snapshot_file))
+
+    print(f"{field_count} fields ({field_count * PLOTS_PER_FIELD} plots), best of {repeat}")
+    print(f"  {'format':<24}{'size':>12}{'load':>12}")
+    print(f"  {'data.json (json.load)':<24}{json_size / 1024:>9.1f} KB{json_time * 1000:>9.2f} ms")
+    print(f"  {'data.snap (open)':<24}{snapshot_size / 1024:>9.1f} KB{open_time * 1000:>9.2f} ms")
+    print(f"  {'data.snap (all pages)':<24}{'':>12}{full_time * 1000:>9.2f} ms")
+    print(f"  open speedup: {json_time / open_time:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,22 @@ import pygame
 import sys
 import json
 import os
+import re
 import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from snapshot import SnapshotTrees, load_snapshot, save_snapshot, source_fingerprint
 
 # --- 設定常數 ---
 SCREEN_WIDTH = 960
 SCREEN_HEIGHT = 540
 FPS = 60
 DATA_FILE = 'data.json'
+SNAPSHOT_FILE = 'data.snap'
+REPORT_FILE = 'summary_report.json'
+# data.json 及其備份 data_<timestamp>.json
+DATA_FILE_PATTERN = re.compile(r'^data(_\d{8}_\d{6})?\.json$')
 
 # 顏色
 WHITE = (255, 255, 255)
@@ -23,6 +32,22 @@ FLOWER = (232, 101, 135)
 FRUIT = (255, 180, 2)
 TREE = (100, 175, 30)
 
+# 圖片資源常駐記憶體上限（bytes）
+# 全螢幕圖約 2 MB，3 MB 只放得下一張：切換畫面時另一張在背景執行緒載入，
+# 載入完成前先以底色代替，小圖示則會提前預載
+ASSET_MEMORY_BUDGET = 3 * 1024 * 1024
+
+# 各畫面狀態會用到的資源分組
+HOME_STATES = ('HOME', 'INPUT_PLAYER_NAME')
+GARDEN_STATES = ('GARDEN_VIEW', 'PROFILE_VIEW', 'INPUT_NAME')
+
+# 進入某狀態後，預先在背景載入下一個可能狀態的資源
+NEXT_STATES = {
+    'HOME': 'GARDEN_VIEW',
+    'INPUT_PLAYER_NAME': 'GARDEN_VIEW',
+    'GARDEN_VIEW': 'HOME',
+}
+
 # 植物種類定義
 PLANT_TYPES = {
     1: "Leisure",  # 花
@@ -75,7 +100,23 @@ DEV_ADD_TIME_RECT = pygame.Rect(110, 100, 180, 35)  # 加時按鈕
 
 # --- 資料處理函式 ---
 
+def is_snapshot_current(snapshot):
+    if not os.path.exists(DATA_FILE):
+        return True
+    # 快照記錄了寫入時 data.json 的大小與 mtime；不一致代表 data.json 被改過或還原過，以 JSON 為準
+    return snapshot.source == source_fingerprint(DATA_FILE)
+
+
 def load_data():
+    if os.path.exists(SNAPSHOT_FILE):
+        try:
+            data = load_snapshot(SNAPSHOT_FILE, PLANT_TYPES)
+        except (OSError, ValueError) as e:
+            print(f"Error reading snapshot: {e}. Loading {DATA_FILE} instead.")
+        else:
+            if is_snapshot_current(data['trees'].snapshot):
+                return data
+            data['trees'].snapshot.close()
     if os.path.exists(DATA_FILE):
         try:
             with open(DATA_FILE, 'r', encoding='utf-8') as f:
@@ -101,7 +142,13 @@ def create_initial_data():
 
 def save_data(data, filename=DATA_FILE):
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+        # default=list：把延遲載入的 SnapshotTrees 當成一般 list 輸出
+        json.dump(data, f, indent=4, ensure_ascii=False, default=list)
+    if filename == DATA_FILE:
+        try:
+            save_snapshot(data, SNAPSHOT_FILE, filename)
+        except (OSError, ValueError) as e:
+            print(f"Error saving snapshot: {e}")
 
 
 def get_current_planting_index(data):
@@ -129,7 +176,14 @@ def calculate_statistics(data):
         2: {"count": 0, "total_time": 0},  # Work (果樹)
         3: {"count": 0, "total_time": 0}   # Commuting (樹)
     }
-    
+
+    if isinstance(data['trees'], SnapshotTrees):
+        # 未開啟過的頁面直接使用快照標頭的彙總，不必逐頁解碼
+        for plant_type, stat in data['trees'].statistics().items():
+            stats[plant_type]["count"] += stat["count"]
+            stats[plant_type]["total_time"] += stat["total_time"]
+        return stats
+
     for field in data['trees']:
         for i in range(9):
             plant_type = field['type'][i]
@@ -140,9 +194,118 @@ def calculate_statistics(data):
     return stats
 
 
-def load_image(filepath, size=None):
+# --- 批次統計（多台裝置的 data.json 彙總） ---
+
+def find_data_files(root_dir):
+    data_files = []
+    for dirpath, _, filenames in os.walk(root_dir):
+        for filename in filenames:
+            if DATA_FILE_PATTERN.match(filename):
+                data_files.append(os.path.join(dirpath, filename))
+    data_files.sort()
+    return data_files
+
+
+def create_empty_aggregate():
+    return {
+        "files": 0,
+        "bytes": 0,
+        "errors": [],
+        "types": {plant_type: {"count": 0, "total_time": 0} for plant_type in PLANT_TYPES},
+        "events": {}
+    }
+
+
+def aggregate_file(filepath):
+    """Map：統計單一檔案，回傳部分結果"""
+    partial = create_empty_aggregate()
+    partial["files"] = 1
     try:
-        image = pygame.image.load(filepath).convert_alpha()
+        partial["bytes"] = os.path.getsize(filepath)
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        stats = calculate_statistics(data)
+        for plant_type, stat in stats.items():
+            partial["types"][plant_type]["count"] += stat["count"]
+            partial["types"][plant_type]["total_time"] += stat["total_time"]
+        for field in data['trees']:
+            for i in range(9):
+                if field['type'][i] != 0:
+                    event = partial["events"].setdefault(field['eventName'][i], {"count": 0, "total_time": 0})
+                    event["count"] += 1
+                    event["total_time"] += field['time'][i]
+    except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+        # 壞檔只記錄下來，不影響其他檔案的統計
+        partial["bytes"] = 0
+        partial["types"] = create_empty_aggregate()["types"]
+        partial["events"] = {}
+        partial["errors"].append(f"{filepath}: {type(e).__name__}: {e}")
+    return partial
+
+
+def merge_aggregates(total, partial):
+    """Reduce：把部分結果合併進 total"""
+    total["files"] += partial["files"]
+    total["bytes"] += partial["bytes"]
+    total["errors"].extend(partial["errors"])
+    for plant_type, stat in partial["types"].items():
+        total["types"][plant_type]["count"] += stat["count"]
+        total["types"][plant_type]["total_time"] += stat["total_time"]
+    for event_name, stat in partial["events"].items():
+        event = total["events"].setdefault(event_name, {"count": 0, "total_time": 0})
+        event["count"] += stat["count"]
+        event["total_time"] += stat["total_time"]
+    return total
+
+
+def aggregate_data_files(root_dir, workers=None):
+    data_files = find_data_files(root_dir)
+    workers = workers or os.cpu_count() or 1
+    # 每個 worker 分到數批，減少行程間往返的次數
+    chunksize = max(1, len(data_files) // (workers * 4))
+
+    total = create_empty_aggregate()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(aggregate_file, data_files, chunksize=chunksize):
+            merge_aggregates(total, partial)
+    elapsed = time.perf_counter() - start
+
+    total["elapsed"] = elapsed
+    total["files_per_sec"] = total["files"] / elapsed if elapsed > 0 else 0
+    total["mb_per_sec"] = total["bytes"] / (1024 * 1024) / elapsed if elapsed > 0 else 0
+    return total
+
+
+def write_summary_report(total, filename=REPORT_FILE):
+    report = {
+        "files": total["files"],
+        "bytes": total["bytes"],
+        "elapsed": round(total["elapsed"], 3),
+        "files_per_sec": round(total["files_per_sec"], 1),
+        "mb_per_sec": round(total["mb_per_sec"], 2),
+        "types": {PLANT_TYPES[plant_type]: stat for plant_type, stat in total["types"].items()},
+        "events": dict(sorted(total["events"].items(), key=lambda item: item[1]["total_time"], reverse=True)),
+        "errors": total["errors"]
+    }
+    # 報告不是玩家資料，不經過 save_data（避免寫入快照）
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+    print(f"Aggregated {total['files']} files in {total['elapsed']:.2f}s "
+          f"({total['files_per_sec']:.1f} files/sec, {total['mb_per_sec']:.2f} MB/sec)")
+    for label, stat in report["types"].items():
+        print(f"  {label}: {stat['count']} plants  |  {format_time(stat['total_time'])}")
+    if total["errors"]:
+        print(f"  {len(total['errors'])} file(s) skipped, see {filename}")
+    print(f"Summary report saved to {filename}")
+
+
+def load_image(filepath, size=None, convert=True):
+    try:
+        image = pygame.image.load(filepath)
+        if convert:
+            image = image.convert_alpha()
         if size:
             image = pygame.transform.scale(image, size)
         return image
@@ -153,16 +316,13 @@ def load_image(filepath, size=None):
         return placeholder
 
 
-def get_plant_sprite(plant_type, duration):
+def get_plant_stage(duration):
     if duration < STAGE_DURATIONS[1]:
-        stage = 1
+        return 1
     elif duration < STAGE_DURATIONS[2]:
-        stage = 2
+        return 2
     else:
-        stage = 3
-
-    filepath = f'./image/plant{plant_type}_{stage}.png'
-    return load_image(filepath, (100, 100))
+        return 3
 
 
 def draw_text(surface, text, font, color, x, y, center=False, bg_color=None, padding=5):
@@ -232,6 +392,147 @@ class TextInputBox:
         pygame.draw.rect(screen, BLACK, self.rect, 2)
 
 
+# --- 圖片資源管理 ---
+
+class AssetManager:
+    """依畫面狀態管理常駐的圖片，超出預算時以 LRU 釋放目前用不到的資源"""
+
+    def __init__(self, budget=ASSET_MEMORY_BUDGET):
+        self.budget = budget
+        self.assets = {}  # name -> (filepath, size, states)
+        self.resident = OrderedDict()  # name -> Surface，越後面越近期使用
+        self.resident_total = 0  # resident 的總 bytes，隨增減維護，不必每次重算
+        self.pending = {}  # name -> Future（背景載入中）
+        self.loader = ThreadPoolExecutor(max_workers=1)
+        self.current_state = None
+
+    def register(self, name, filepath, size, states):
+        self.assets[name] = (filepath, size, set(states))
+
+    def get(self, name):
+        if name in self.resident:
+            self.resident.move_to_end(name)
+            return self.resident[name]
+
+        filepath, size, _ = self.assets[name]
+        if name in self.pending:
+            # 背景只做解碼與縮放，convert_alpha 需在主執行緒執行
+            image = self.pending.pop(name).result().convert_alpha()
+        else:
+            image = load_image(filepath, size)
+        self.add(name, image)
+        self.evict()
+        return image
+
+    def get_ready(self, name):
+        # 不等待載入：還沒好就回傳 None，由呼叫端先畫替代畫面
+        if name in self.resident:
+            self.resident.move_to_end(name)
+            return self.resident[name]
+        if name not in self.pending:
+            self.load_async(name, {self.current_state})
+        return None
+
+    def add(self, name, image):
+        self.resident[name] = image
+        self.resident_total += self.asset_bytes(name)
+
+    def remove(self, name):
+        self.resident_total -= self.asset_bytes(name)
+        del self.resident[name]
+
+    def collect(self):
+        # 每幀呼叫一次：背景載入完成的圖片移入 resident，一併計入預算
+        if not self.pending:
+            return
+        for name, future in list(self.pending.items()):
+            if future.done():
+                del self.pending[name]
+                if not future.cancelled():
+                    self.add(name, future.result().convert_alpha())
+        self.evict()
+
+    def set_state(self, state):
+        self.current_state = state
+        next_state = NEXT_STATES.get(state)
+        # 取消新狀態與下一個狀態都用不到的背景載入
+        for name, future in list(self.pending.items()):
+            states = self.assets[name][2]
+            if state not in states and next_state not in states and future.cancel():
+                del self.pending[name]
+        self.collect()
+        self.evict()
+
+        # 目前狀態還沒載入的圖片立刻在背景載入，不卡住主執行緒
+        for name, (_, _, states) in self.assets.items():
+            if state in states and name not in self.resident and name not in self.pending:
+                self.load_async(name, {state})
+        if next_state is not None:
+            self.prefetch(next_state)
+
+    def prefetch(self, state):
+        keep_states = {self.current_state, state}
+        for name, (_, _, states) in self.assets.items():
+            if state in states and name not in self.resident and name not in self.pending:
+                # 放不下就不預載，避免預載後又馬上被釋放
+                if self.make_room(self.estimate_bytes(name), keep_states):
+                    self.submit(name)
+
+    def load_async(self, name, keep_states):
+        # 目前狀態需要的圖片一定要載入，盡量騰出空間即可
+        self.make_room(self.estimate_bytes(name), keep_states)
+        self.submit(name)
+
+    def submit(self, name):
+        filepath, size, _ = self.assets[name]
+        self.pending[name] = self.loader.submit(load_image, filepath, size, False)
+
+    def make_room(self, size, keep_states):
+        # 依 LRU 釋放 keep_states 都用不到的圖片，直到放得下 size
+        used = self.resident_total + sum(self.estimate_bytes(name) for name in self.pending)
+        for name in list(self.resident):
+            if used + size <= self.budget:
+                break
+            if not keep_states & self.assets[name][2]:
+                used -= self.asset_bytes(name)
+                self.remove(name)
+        return used + size <= self.budget
+
+    def estimate_bytes(self, name):
+        width, height = self.assets[name][1]
+        return width * height * 4
+
+    def is_needed(self, name):
+        return self.current_state in self.assets[name][2]
+
+    def evict(self):
+        if self.resident_total <= self.budget:
+            return
+        for name in list(self.resident):
+            if self.resident_total <= self.budget:
+                break
+            if not self.is_needed(name):
+                self.remove(name)
+
+    def asset_bytes(self, name):
+        image = self.resident[name]
+        return image.get_pitch() * image.get_height()
+
+    def resident_bytes(self):
+        return self.resident_total
+
+    def report(self):
+        return {name: self.asset_bytes(name) for name in self.resident}
+
+    def print_report(self):
+        for name, size in sorted(self.report().items(), key=lambda item: item[1], reverse=True):
+            print(f"  {name}: {size / 1024:.1f} KB")
+        print(f"Resident: {self.resident_bytes() / (1024 * 1024):.2f} MB / {self.budget / (1024 * 1024):.2f} MB")
+
+    def shutdown(self):
+        self.loader.shutdown(wait=False, cancel_futures=True)
+
+
 # --- 主遊戲類別 ---
 
 class ThrivingLikeTrees:
@@ -250,17 +551,25 @@ class ThrivingLikeTrees:
         self.font_medium = pygame.font.Font(font_path, 24)
         self.font_large = pygame.font.Font(font_path, 36)
 
-        # 載入資源
-        self.background_img = load_image('./image/background.png', (SCREEN_WIDTH, SCREEN_HEIGHT))
-        self.home_img = load_image('./image/Home.png', (SCREEN_WIDTH, SCREEN_HEIGHT))
-        self.start_button_img = load_image('./image/start_button.png', (100, 50))
-        self.home_button_img = load_image('./image/home_button.png', (100, 50))
-        self.stop_button_img = load_image('./image/stop_button.png', (100, 50))
-        self.plant_select_imgs = {
-            1: load_image('./image/flower_icon.png', (80, 80)),
-            2: load_image('./image/orange_icon.png', (80, 80)),
-            3: load_image('./image/tree_icon.png', (80, 80)),
+        # 登記資源，實際載入交給 AssetManager 依狀態處理
+        self.assets = AssetManager()
+        self.assets.register('background', './image/background.png', (SCREEN_WIDTH, SCREEN_HEIGHT), GARDEN_STATES)
+        self.assets.register('home', './image/Home.png', (SCREEN_WIDTH, SCREEN_HEIGHT), HOME_STATES)
+        self.assets.register('start_button', './image/start_button.png', (100, 50), HOME_STATES + GARDEN_STATES)
+        self.assets.register('home_button', './image/home_button.png', (100, 50), GARDEN_STATES)
+        self.assets.register('stop_button', './image/stop_button.png', (100, 50), GARDEN_STATES)
+        self.assets.register('flower_icon', './image/flower_icon.png', (80, 80), GARDEN_STATES)
+        self.assets.register('orange_icon', './image/orange_icon.png', (80, 80), GARDEN_STATES)
+        self.assets.register('tree_icon', './image/tree_icon.png', (80, 80), GARDEN_STATES)
+        self.plant_select_names = {
+            1: 'flower_icon',
+            2: 'orange_icon',
+            3: 'tree_icon',
         }
+        for plant_type in PLANT_TYPES:
+            for stage in range(1, 4):
+                self.assets.register(f'plant{plant_type}_{stage}', f'./image/plant{plant_type}_{stage}.png',
+                                     (100, 100), GARDEN_STATES)
 
         self.state = 'HOME'
         self.data = load_data()
@@ -301,6 +610,7 @@ class ThrivingLikeTrees:
                     self.current_duration = int(time.time() - self.start_time)
                     self.stop_timer(event_name="Event")
                 save_data(self.data)
+                self.assets.shutdown()
                 pygame.quit()
                 sys.exit()
 
@@ -351,6 +661,8 @@ class ThrivingLikeTrees:
                     # 1. 切換選單開關
                     if DEV_TOGGLE_RECT.collidepoint(mouse_pos):
                         self.show_dev_menu = not self.show_dev_menu
+                        if self.show_dev_menu:
+                            self.assets.print_report()
                         return  # 點擊選單按鈕後不處理其他點擊
 
                     # 2. 如果選單開啟，處理選單按鈕
@@ -528,9 +840,18 @@ class ThrivingLikeTrees:
         draw_text(self.screen, "+15 Mins (Grow)", self.font_smallMedium, WHITE, DEV_ADD_TIME_RECT.centerx,
                   DEV_ADD_TIME_RECT.centery, center=True)
 
+        # 常駐圖片記憶體
+        resident_mb = self.assets.resident_bytes() / (1024 * 1024)
+        draw_text(self.screen, f"Assets: {resident_mb:.2f} MB", self.font_small, WHITE, DEV_MENU_BG_RECT.x,
+                  DEV_MENU_BG_RECT.bottom + 5, bg_color=DARK_GREY)
+
     def draw_home(self):
-        self.screen.blit(self.home_img, (0, 0))
-        self.screen.blit(self.start_button_img, self.enter_game_button_rect)
+        home_img = self.assets.get_ready('home')
+        if home_img is None:  # 背景載入中
+            self.screen.fill(LIGHT_GREY)
+        else:
+            self.screen.blit(home_img, (0, 0))
+        self.screen.blit(self.assets.get('start_button'), self.enter_game_button_rect)
 
     def draw_name_input(self):
         s = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
@@ -594,7 +915,11 @@ class ThrivingLikeTrees:
                   SCREEN_WIDTH // 2, 450, center=True)
 
     def draw_garden(self):
-        self.screen.blit(self.background_img, (0, 0))
+        background_img = self.assets.get_ready('background')
+        if background_img is None:  # 背景載入中
+            self.screen.fill(LIGHT_GREY)
+        else:
+            self.screen.blit(background_img, (0, 0))
 
         s = pygame.Surface((PROFILE_BUTTON_RADIUS * 2, PROFILE_BUTTON_RADIUS * 2), pygame.SRCALPHA)
         pygame.draw.circle(s, (255, 255, 255, 40), (PROFILE_BUTTON_RADIUS, PROFILE_BUTTON_RADIUS), PROFILE_BUTTON_RADIUS)
@@ -619,7 +944,7 @@ class ThrivingLikeTrees:
                 is_growing_now = True
 
             if plant_type != 0:
-                plant_sprite = get_plant_sprite(plant_type, duration_to_display)
+                plant_sprite = self.assets.get(f'plant{plant_type}_{get_plant_stage(duration_to_display)}')
                 rect = plant_sprite.get_rect(center=(x, y))
                 self.screen.blit(plant_sprite, rect)
 
@@ -639,8 +964,9 @@ class ThrivingLikeTrees:
 
         for plant_type, rect in BUTTON_RECTS.items():
             pygame.draw.circle(self.screen, (255, 247, 214), (rect.x + rect.width / 2, rect.y + rect.width / 2), 40)
-            icon_rect = self.plant_select_imgs[plant_type].get_rect(center=rect.center)
-            self.screen.blit(self.plant_select_imgs[plant_type], icon_rect)
+            icon_img = self.assets.get(self.plant_select_names[plant_type])
+            icon_rect = icon_img.get_rect(center=rect.center)
+            self.screen.blit(icon_img, icon_rect)
             if self.selected_plant_type == plant_type:
                 pygame.draw.rect(self.screen, GREEN, rect, 3)
 
@@ -648,9 +974,9 @@ class ThrivingLikeTrees:
         draw_text(self.screen, timer_text, self.font_large, BLACK, 800, 40, center=True, bg_color=LIGHT_GREY)
 
         if is_active_session:
-            button_img = self.stop_button_img
+            button_img = self.assets.get('stop_button')
         else:
-            button_img = self.start_button_img
+            button_img = self.assets.get('start_button')
 
         self.screen.blit(button_img, START_BUTTON_RECT)
 
@@ -661,7 +987,7 @@ class ThrivingLikeTrees:
         page_info = f"Garden {self.current_field_index + 1}/{len(self.data['trees'])}"
         draw_text(self.screen, page_info, self.font_medium, (255, 100, 100), SCREEN_WIDTH // 2, 25, center=True, bg_color=(255, 255, 200))
 
-        self.screen.blit(self.home_button_img, home_button_rect)
+        self.screen.blit(self.assets.get('home_button'), home_button_rect)
 
         if self.warning_text and time.time() < self.warning_time:
             s = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
@@ -684,6 +1010,9 @@ class ThrivingLikeTrees:
         running = True
         while running:
             self.handle_input()
+            if self.state != self.assets.current_state:
+                self.assets.set_state(self.state)
+            self.assets.collect()
             if self.state == 'GARDEN_VIEW':
                 self.update()
             self.draw()
@@ -691,9 +1020,20 @@ class ThrivingLikeTrees:
 
 
 if __name__ == '__main__':
+    # 批次統計：python main.py --aggregate <資料夾> [報告檔名]
+    if len(sys.argv) >= 3 and sys.argv[1] == '--aggregate':
+        output = sys.argv[3] if len(sys.argv) >= 4 else REPORT_FILE
+        # 報告檔名若像 data.json / data_<timestamp>.json，會覆寫玩家資料，下次也會被當成裝置資料統計
+        if DATA_FILE_PATTERN.match(os.path.basename(output)):
+            print(f"Refusing to write the report to {output}: the name is reserved for device data.")
+            sys.exit(1)
+        write_summary_report(aggregate_data_files(sys.argv[2]), output)
+        sys.exit()
+
     if not os.path.exists('image'):
         os.makedirs('image')
-    if not os.path.exists(DATA_FILE):
+    # 只有 data.snap 時直接從快照載入，不能用空白資料覆寫它
+    if not os.path.exists(DATA_FILE) and not os.path.exists(SNAPSHOT_FILE):
         save_data(create_initial_data())
     game = ThrivingLikeTrees()
     game.run()
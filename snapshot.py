@@ -0,0 +1,320 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import MutableSequence
+
+# --- 二進位欄式快照格式 ---
+#
+# 檔案配置（little-endian）：
+#   HEADER     magic, 版本, 每頁格數, 頁數, 名字長度, 植物種類數
+#   SECTIONS   各欄位在檔案中的位移
+#   SOURCE     來源 data.json 的大小與 mtime_ns，用來判斷快照是否仍對應該檔
+#   name       UTF-8
+#   AGGREGATE  每種植物的數量 / 總時間 × 植物種類數
+#   type 欄    每格 1 byte
+#   time 欄    每格 int64
+#   eventName  (總格數 + 1) 個 uint64 位移 + UTF-8 blob
+#
+# 開啟時只讀標頭，各頁的資料等到真的要顯示才從 mmap 解碼。
+
+SNAPSHOT_MAGIC = b'TLTS'
+SNAPSHOT_VERSION = 2
+PLOTS_PER_FIELD = 9
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+HEADER = struct.Struct('<4sHHIIH')
+SECTIONS = struct.Struct('<QQQQ')
+SOURCE = struct.Struct('<Qq')
+AGGREGATE = struct.Struct('<BQq')
+
+
+def _align(offset, size=8):
+    return (offset + size - 1) // size * size
+
+
+def field_statistics(field):
+    stats = {}
+    for plant_type, plant_time in zip(field['type'], field['time']):
+        if plant_type != 0:
+            stat = stats.setdefault(plant_type, {"count": 0, "total_time": 0})
+            stat["count"] += 1
+            stat["total_time"] += plant_time
+    return stats
+
+
+def _check_field(field):
+    if not isinstance(field, dict):
+        raise ValueError(f"Field {field!r} cannot be stored in a snapshot")
+    for key in ('type', 'time', 'eventName'):
+        if not isinstance(field.get(key), list) or len(field[key]) != PLOTS_PER_FIELD:
+            raise ValueError(f"Field '{key}' must be a list of {PLOTS_PER_FIELD} plots")
+    for plant_type in field['type']:
+        if not isinstance(plant_type, int) or not 0 <= plant_type <= 255:
+            raise ValueError(f"Plant type {plant_type!r} cannot be stored in a snapshot")
+    for plant_time in field['time']:
+        if not isinstance(plant_time, int) or not INT64_MIN <= plant_time <= INT64_MAX:
+            raise ValueError(f"Plant time {plant_time!r} cannot be stored in a snapshot")
+    for event_name in field['eventName']:
+        if not isinstance(event_name, str):
+            raise ValueError(f"Event name {event_name!r} cannot be stored in a snapshot")
+
+
+def _check_data(data):
+    # 只接受能無損還原的資料，其他一律 ValueError，交由呼叫端改用 JSON
+    if not isinstance(data, dict) or not isinstance(data.get('name'), str):
+        raise ValueError("Snapshot data needs a string 'name'")
+    if not isinstance(data.get('trees'), (list, SnapshotTrees)):
+        raise ValueError("Snapshot data needs a 'trees' list")
+    for field in data['trees']:
+        _check_field(field)
+    for total in field_statistics_total(data['trees']).values():
+        if total["total_time"] > INT64_MAX or total["total_time"] < INT64_MIN:
+            raise ValueError("Total plant time cannot be stored in a snapshot")
+
+
+def field_statistics_total(fields):
+    stats = {}
+    for field in fields:
+        for plant_type, stat in field_statistics(field).items():
+            total = stats.setdefault(plant_type, {"count": 0, "total_time": 0})
+            total["count"] += stat["count"]
+            total["total_time"] += stat["total_time"]
+    return stats
+
+
+def source_fingerprint(filename):
+    if filename is None or not os.path.exists(filename):
+        return 0, 0
+    stat = os.stat(filename)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def encode_snapshot(data, source_filename=None):
+    _check_data(data)
+    fields = list(data['trees'])
+
+    stats = field_statistics_total(fields)
+
+    name = data['name'].encode('utf-8')
+    plot_count = len(fields) * PLOTS_PER_FIELD
+
+    types = bytes(plant_type for field in fields for plant_type in field['type'])
+    times = struct.pack(f'<{plot_count}q', *(plant_time for field in fields for plant_time in field['time']))
+    event_offsets = [0]
+    blob = bytearray()
+    for field in fields:
+        for event_name in field['eventName']:
+            blob += event_name.encode('utf-8')
+            event_offsets.append(len(blob))
+    event_offsets = struct.pack(f'<{plot_count + 1}Q', *event_offsets)
+
+    name_offset = HEADER.size + SECTIONS.size + SOURCE.size
+    aggregate_offset = name_offset + len(name)
+    type_offset = _align(aggregate_offset + AGGREGATE.size * len(stats))
+    time_offset = _align(type_offset + len(types))
+    event_offset = time_offset + len(times)
+    blob_offset = event_offset + len(event_offsets)
+
+    buffer = bytearray(blob_offset + len(blob))
+    HEADER.pack_into(buffer, 0, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, PLOTS_PER_FIELD,
+                     len(fields), len(name), len(stats))
+    SECTIONS.pack_into(buffer, HEADER.size, type_offset, time_offset, event_offset, blob_offset)
+    SOURCE.pack_into(buffer, HEADER.size + SECTIONS.size, *source_fingerprint(source_filename))
+    buffer[name_offset:aggregate_offset] = name
+    for i, (plant_type, stat) in enumerate(sorted(stats.items())):
+        AGGREGATE.pack_into(buffer, aggregate_offset + i * AGGREGATE.size,
+                            plant_type, stat["count"], stat["total_time"])
+    buffer[type_offset:type_offset + len(types)] = types
+    buffer[time_offset:event_offset] = times
+    buffer[event_offset:blob_offset] = event_offsets
+    buffer[blob_offset:] = blob
+    return bytes(buffer)
+
+
+def save_snapshot(data, filename, source_filename=None):
+    payload = encode_snapshot(data, source_filename)
+    # 先寫暫存檔再取代，避免寫到一半的快照被讀到
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'wb') as f:
+        f.write(payload)
+    os.replace(temp_filename, filename)
+
+
+class Snapshot:
+    def __init__(self, filename, plant_types=None):
+        # plant_types：允許的植物種類，None 表示不限制（0 代表空格，一律允許）
+        self.allowed_types = None if plant_types is None else bytes([0, *plant_types])
+        with open(filename, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_header()
+        except ValueError:
+            self.close()
+            raise
+        except struct.error as e:
+            self.close()
+            raise ValueError(f"Corrupt snapshot: {e}") from e
+
+    def _read_header(self):
+        magic, version, self.plots, self.field_count, name_len, type_count = HEADER.unpack_from(self.mm, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not a snapshot file")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}")
+        if self.plots != PLOTS_PER_FIELD:
+            raise ValueError(f"Snapshot has {self.plots} plots per field, expected {PLOTS_PER_FIELD}")
+        self.type_offset, self.time_offset, self.event_offset, self.blob_offset = \
+            SECTIONS.unpack_from(self.mm, HEADER.size)
+        self.source = SOURCE.unpack_from(self.mm, HEADER.size + SECTIONS.size)
+
+        # 各欄位必須完整落在檔案內，否則之後解碼頁面時才會出錯
+        name_offset = HEADER.size + SECTIONS.size + SOURCE.size
+        plot_count = self.field_count * self.plots
+        size = len(self.mm)
+        if (name_offset + name_len + AGGREGATE.size * type_count > size
+                or self.type_offset + plot_count > size
+                or self.time_offset + plot_count * 8 > size
+                or self.event_offset + (plot_count + 1) * 8 > size
+                or self.blob_offset > size):
+            raise ValueError("Corrupt snapshot: section out of bounds")
+        self.blob_size, = struct.unpack_from('<Q', self.mm, self.event_offset + plot_count * 8)
+        if self.blob_offset + self.blob_size > size:
+            raise ValueError("Corrupt snapshot: eventName blob out of bounds")
+        # type 欄每格只有 1 byte，整欄檢查很便宜；未知種類之後會讓統計與繪圖出錯
+        if self.allowed_types is not None and \
+                self.mm[self.type_offset:self.type_offset + plot_count].translate(None, self.allowed_types):
+            raise ValueError("Corrupt snapshot: unknown plant type")
+
+        self.name = self.mm[name_offset:name_offset + name_len].decode('utf-8')
+
+        self.stats = {}
+        aggregate_offset = name_offset + name_len
+        for i in range(type_count):
+            plant_type, count, total_time = AGGREGATE.unpack_from(self.mm, aggregate_offset + i * AGGREGATE.size)
+            if plant_type == 0 or (self.allowed_types is not None and plant_type not in self.allowed_types):
+                raise ValueError(f"Corrupt snapshot: unknown plant type {plant_type} in header")
+            self.stats[plant_type] = {"count": count, "total_time": total_time}
+
+        self.time_format = struct.Struct(f'<{self.plots}q')
+        self.event_format = struct.Struct(f'<{self.plots + 1}Q')
+
+    def field(self, index):
+        start = index * self.plots
+        types = list(self.mm[self.type_offset + start:self.type_offset + start + self.plots])
+        times = list(self.time_format.unpack_from(self.mm, self.time_offset + start * 8))
+        offsets = self.event_format.unpack_from(self.mm, self.event_offset + start * 8)
+        # eventName 位移只在解碼該頁時檢查，開啟時不讀整欄
+        for i in range(self.plots):
+            if not offsets[i] <= offsets[i + 1] <= self.blob_size:
+                raise ValueError(f"Corrupt snapshot: bad eventName offsets in field {index}")
+        event_names = [self.mm[self.blob_offset + offsets[i]:self.blob_offset + offsets[i + 1]].decode('utf-8')
+                       for i in range(self.plots)]
+        return {
+            "type": types,
+            "time": times,
+            "eventName": event_names
+        }
+
+    def close(self):
+        self.mm.close()
+
+
+class SnapshotTrees(MutableSequence):
+    """data['trees'] 的延遲載入版本，頁面第一次被存取時才解碼"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.fields = [None] * snapshot.field_count
+        # 每頁在快照中的紀錄編號，新插入的頁面為 None；插入/刪除時與 fields 一起位移
+        self.sources = list(range(snapshot.field_count))
+        self.undecoded = snapshot.field_count
+        # 尚未解碼頁面的統計 = 標頭彙總 - 已解碼頁面原本的統計
+        self.undecoded_stats = {plant_type: dict(stat) for plant_type, stat in snapshot.stats.items()}
+        if self.undecoded == 0:
+            snapshot.close()
+
+    def _decode(self, index):
+        if self.fields[index] is None:
+            field = self.snapshot.field(self.sources[index])
+            for plant_type, stat in field_statistics(field).items():
+                self.undecoded_stats[plant_type]["count"] -= stat["count"]
+                self.undecoded_stats[plant_type]["total_time"] -= stat["total_time"]
+            self.fields[index] = field
+            self.undecoded -= 1
+            if self.undecoded == 0:
+                # 全部解碼後就不再需要 mmap，關閉以便覆寫快照檔
+                self.snapshot.close()
+        return self.fields[index]
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(i) for i in range(*index.indices(len(self)))]
+        return self._decode(range(len(self))[index])
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            raise TypeError("Slice assignment is not supported")
+        index = range(len(self))[index]
+        self._decode(index)
+        self.fields[index] = value
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            raise TypeError("Slice deletion is not supported")
+        index = range(len(self))[index]
+        self._decode(index)
+        del self.fields[index]
+        del self.sources[index]
+
+    def insert(self, index, value):
+        self.fields.insert(index, value)
+        self.sources.insert(index, None)
+
+    def statistics(self):
+        stats = {plant_type: dict(stat) for plant_type, stat in self.undecoded_stats.items()}
+        for field in self.fields:
+            if field is not None:
+                for plant_type, stat in field_statistics(field).items():
+                    total = stats.setdefault(plant_type, {"count": 0, "total_time": 0})
+                    total["count"] += stat["count"]
+                    total["total_time"] += stat["total_time"]
+        return stats
+
+
+def load_snapshot(filename, plant_types=None):
+    snapshot = Snapshot(filename, plant_types)
+    return {
+        "name": snapshot.name,
+        "trees": SnapshotTrees(snapshot)
+    }
+
+
+def snapshot_to_json(snapshot_filename, json_filename):
+    data = load_snapshot(snapshot_filename)
+    data['trees'] = list(data['trees'])
+    with open(json_filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+def json_to_snapshot(json_filename, snapshot_filename):
+    with open(json_filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    save_snapshot(data, snapshot_filename, json_filename)
+
+
+if __name__ == '__main__':
+    # 格式轉換：python snapshot.py <輸入檔> <輸出檔>，依副檔名決定方向
+    if len(sys.argv) != 3:
+        print("Usage: python snapshot.py data.json data.snap  |  python snapshot.py data.snap data.json")
+        sys.exit(1)
+    if sys.argv[1].endswith('.json'):
+        json_to_snapshot(sys.argv[1], sys.argv[2])
+    else:
+        snapshot_to_json(sys.argv[1], sys.argv[2])
+    print(f"Converted {sys.argv[1]} -> {sys.argv[2]}")